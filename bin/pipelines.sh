@@ -673,7 +673,7 @@ if [[ "$transform_pathway" != "" ]]; then
   
   if [[ "$animation" != "" ]]; then
     # Export transformed image to an animated GIF or MP4 video 
-    # (requires ImageMagick)
+    # (MP4 requires imageio-ffmpeg)
     python -u -m magmap.io.cli --img "$img_transformed" --proc animated \
       --interval 5 --transform rescale=1.0 --savefig "$animation"
   fi
@@ -3,6 +3,7 @@
 """Handle ontology lookup.
 """
 
+import functools
 import os
 from collections import OrderedDict
 import json
@@ -105,6 +106,40 @@ def create_aba_reverse_lookup(labels_ref):
         config.ABAKeys.CHILDREN.value)
 
 
+def load_aba_reverse_lookup(path):
+    """Load an Allen Brain Atlas style ontology file into a reverse lookup
+    dictionary.
+    
+    The lookup is cached so that repeated loads of an unmodified file
+    reuse the parsed file and lookup.
+    
+    Args:
+        path (str): Path to the ontology JSON file.
+    
+    Returns:
+        Reverse lookup dictionary as output by
+        :func:`create_aba_reverse_lookup`.
+    """
+    return _load_aba_reverse_lookup(path, os.path.getmtime(path))
+
+
+@functools.lru_cache(maxsize=4)
+def _load_aba_reverse_lookup(path, mtime):
+    """Load and cache a reverse lookup dictionary for
+    :func:`load_aba_reverse_lookup`.
+    
+    Args:
+        path (str): Path to the ontology JSON file.
+        mtime (float): Modification time of ``path`` to reload the file
+            when it changes.
+    
+    Returns:
+        Reverse lookup dictionary as output by
+        :func:`create_aba_reverse_lookup`.
+    """
+    return create_aba_reverse_lookup(load_labels_ref(path))
+
+
 def create_reverse_lookup(nested_dict, key, key_children, id_dict=OrderedDict(), 
                           parent_list=None):
     """Create a reveres lookup dictionary with the values of the original 
@@ -425,9 +460,9 @@ def get_label_ids_from_position(coord, labels_img, scaling=None, rounding=False,
         coord_scaled = coord_scaled.astype(np.int)
     
     # index blob coordinates into labels image by int array indexing to 
-    # get the corresponding label IDs
-    coordsi = libmag.coords_for_indexing(coord_scaled)
-    label_ids = labels_img[tuple(coordsi)][0]
+    # get the corresponding label IDs, using views of each coordinate axis
+    # rather than splitting the coordinates into copies
+    label_ids = labels_img[tuple(np.transpose(coord_scaled))]
     if return_coord_scaled:
         return label_ids, coord_scaled
     return label_ids
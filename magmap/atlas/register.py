@@ -1689,8 +1689,8 @@ def main():
     elif reg is config.RegisterTypes.EXPORT_REGIONS:
         # export regions IDs to CSV files
         
-        ref = ontology.load_labels_ref(config.load_labels)
-        labels_ref_lookup = ontology.create_aba_reverse_lookup(ref)
+        labels_ref_lookup = ontology.load_aba_reverse_lookup(
+            config.load_labels)
         
         # export region IDs and parents at given level to CSV
         path = "region_ids"
@@ -1845,8 +1845,8 @@ def main():
     elif reg in (config.RegisterTypes.VOL_STATS,
                  config.RegisterTypes.VOL_COMPARE):
         # volumes stats
-        labels_ref_lookup = ontology.create_aba_reverse_lookup(
-            ontology.load_labels_ref(config.load_labels))
+        labels_ref_lookup = ontology.load_aba_reverse_lookup(
+            config.load_labels)
         groups = {}
         if config.groups is not None:
             groups[config.GENOTYPE_KEY] = [
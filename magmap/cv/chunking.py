@@ -53,10 +53,15 @@ def is_fork():
     return mp.get_start_method(False) == "fork"
 
 
-def get_mp_pool():
+def get_mp_pool(max_procs=None):
     """Get a multiprocessing ``Pool`` object, configured based on ``config``
     settings.
     
+    Args:
+        max_procs (int): Maximum number of processes, such as the number
+            of tasks when fewer than the available CPUs, to avoid starting
+            idle processes; defaults to None for no limit.
+    
     Returns:
         :obj:`multiprocessing.Pool`: Pool object with number of processes
         and max tasks per process determined by command-line and the main
@@ -65,10 +70,14 @@ def get_mp_pool():
     """
     prof = config.get_roi_profile(0)
     max_tasks = None if not prof else prof["mp_max_tasks"]
+    procs = config.cpus
+    if max_procs is not None:
+        # cap the number of processes, which otherwise defaults to all CPUs
+        procs = min(mp.cpu_count() if procs is None else procs, max_procs)
     print("Setting up multiprocessing pool with {} processes (None uses all "
           "available)\nand max tasks of {} before replacing processes (None "
-          "does not replace processes)".format(config.cpus, max_tasks))
-    return mp.Pool(processes=config.cpus, maxtasksperchild=max_tasks)
+          "does not replace processes)".format(procs, max_tasks))
+    return mp.Pool(processes=procs, maxtasksperchild=max_tasks)
 
 
 def calc_overlap():
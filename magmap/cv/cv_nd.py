@@ -15,6 +15,10 @@ from magmap.settings import config
 from magmap.cv import segmenter
 from magmap.io import libmag
 
+#: int: Maximum range of label values to map through a dense lookup table
+# rather than by binary search.
+_LUT_MAX = 2 ** 20
+
 
 def in_paint(roi, to_fill):
     """In-paint to interpolate values into pixels to fill from nearest 
@@ -565,6 +569,64 @@ def get_label_bbox(labels_img_np, label_id):
     return bbox
 
 
+def map_labels(labels_img_np, ids, vals, default=None):
+    """Map label IDs in a labels image to new values in a single pass.
+    
+    Integer labels whose values span a limited range are mapped through
+    a dense lookup table. Otherwise, including labels of other types such
+    as float, labels are found among the sorted IDs by binary search.
+    
+    Args:
+        labels_img_np (:obj:`np.ndarray`): Labels image.
+        ids (Sequence[int]): Label IDs to map.
+        vals (Sequence): Values to which each label in ``ids`` will be
+            mapped. If an ID is given multiple times, its last value is used.
+        default: Value for labels not in ``ids``; defaults to None to keep
+            these labels unchanged.
+    
+    Returns:
+        :obj:`np.ndarray`: Array of the same shape as ``labels_img_np`` with
+        mapped values, in the type of ``labels_img_np`` if ``default`` is
+        None, or otherwise in a type that holds both ``vals`` and ``default``.
+    """
+    ids = np.asarray(ids).ravel()
+    vals = np.asarray(vals).ravel()
+    if default is None:
+        dtype = labels_img_np.dtype
+    else:
+        dtype = np.result_type(vals, default)
+    if labels_img_np.size == 0:
+        return np.zeros(labels_img_np.shape, dtype=dtype)
+    if np.issubdtype(labels_img_np.dtype, np.integer):
+        lbl_min = int(np.amin(labels_img_np))
+        lbl_max = int(np.amax(labels_img_np))
+        if lbl_max - lbl_min < _LUT_MAX:
+            # build a table spanning the labels' range, offset by the min
+            if default is None:
+                lut = np.arange(lbl_min, lbl_max + 1).astype(dtype)
+            else:
+                lut = np.full(lbl_max - lbl_min + 1, default, dtype=dtype)
+            ids = ids.astype(np.int64, copy=False)
+            in_range = np.logical_and(ids >= lbl_min, ids <= lbl_max)
+            lut[ids[in_range] - lbl_min] = vals[in_range]
+            return lut[np.subtract(labels_img_np, lbl_min, dtype=np.intp)]
+    
+    # look up labels among the sorted IDs, keeping the last of duplicate IDs
+    ids_rev = ids[::-1]
+    ids_sorted, inds = np.unique(ids_rev, return_index=True)
+    vals_sorted = vals[::-1][inds]
+    if default is None:
+        mapped = labels_img_np.copy()
+    else:
+        mapped = np.full(labels_img_np.shape, default, dtype=dtype)
+    if ids_sorted.size > 0:
+        found_inds = np.searchsorted(ids_sorted, labels_img_np)
+        np.clip(found_inds, None, ids_sorted.size - 1, out=found_inds)
+        found = ids_sorted[found_inds] == labels_img_np
+        mapped[found] = vals_sorted[found_inds[found]]
+    return mapped
+
+
 def meas_region(mask, res):
     """Measure the dimensions of a masked region.
 
@@ -799,13 +861,16 @@ def build_heat_map(shape, coords):
         corresponding to the number of point occurrences at each pixel.
     """
     if coords is not None and len(coords) > 0:
-        # get counts of points at the same coordinate as a measure of density
+        # get counts of points at the same coordinate as a measure of
+        # density, flattening coordinates to find unique values in 1D
+        # rather than unique rows, and fill in only these pixels
+        coords_flat = np.ravel_multi_index(
+            tuple(np.transpose(coords).astype(np.intp, copy=False)), shape)
         coords_unique, coords_count = np.unique(
-            coords, return_counts=True, axis=0)
-        coordsi = libmag.coords_for_indexing(coords_unique)
+            coords_flat, return_counts=True)
         dtype = libmag.dtype_within_range(0, np.amax(coords_count), True, False)
         heat_map = np.zeros(shape, dtype=dtype)
-        heat_map[tuple(coordsi)] = coords_count
+        heat_map.flat[coords_unique] = coords_count
     else:
         # generate an array with small int type if no coords are available
         heat_map = np.zeros(shape, dtype=np.uint8)
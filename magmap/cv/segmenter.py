@@ -3,6 +3,8 @@
 """Segment regions based on blobs, labels, and underlying features.
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from time import time
 
 import numpy as np
@@ -20,12 +22,18 @@ from magmap.plot import plot_3d
 from magmap.io import df_io
 
 
-def _markers_from_blobs(roi, blobs):
-    # use blobs as seeds by converting blobs into marker image
+def _blobs_to_coords(blobs):
+    # convert blob coordinates to a contiguous integer array for each axis,
+    # allowing reuse across channels without recasting the blobs
+    return tuple(np.ascontiguousarray(blobs[:, :3].T, dtype=np.intp))
+
+
+def _markers_from_blobs(roi, coords):
+    # use blobs as seeds by converting blobs into marker image, where
+    # coords are from _blobs_to_coords
     markers = np.zeros(roi.shape, dtype=np.uint8)
-    coords = libmag.coords_for_indexing(blobs[:, :3].astype(int))
-    markers[tuple(coords)] = 1
-    markers = morphology.dilation(markers, morphology.ball(1))
+    markers[coords] = 1
+    markers = ndimage.grey_dilation(markers, footprint=morphology.ball(1))
     markers = measure.label(markers)
     return markers
 
@@ -43,8 +51,9 @@ def _carve_segs(roi, blobs):
         # thick lightsheet
         thresholded = plot_3d.build_ground_truth(
             np.zeros(carved.shape, dtype=bool), blobs, ellipsoid=True)
-        #thresholded = thresholded.astype(bool)
-        carved[~thresholded] = 0
+        # zero the background in-place by multiplying by the boolean mask,
+        # which avoids allocating an inverted mask and a masked assignment
+        carved *= thresholded
     return carved
 
 
@@ -80,6 +89,7 @@ def segment_rw(roi, channel, beta=50.0, vmin=0.6, vmax=0.65, remove_small=None,
     labels = []
     walkers = []
     multichannel, channels = plot_3d.setup_channels(roi, channel, 3)
+    blobs_coords = None if blobs is None else _blobs_to_coords(blobs)
     for i in channels:
         roi_segment = roi[..., i] if multichannel else roi
         if blobs is None:
@@ -90,7 +100,7 @@ def segment_rw(roi, channel, beta=50.0, vmin=0.6, vmax=0.65, remove_small=None,
             markers[roi_segment >= vmax] = 1
         else:
             # derive markers from blobs
-            markers = _markers_from_blobs(roi_segment, blobs)
+            markers = _markers_from_blobs(roi_segment, blobs_coords)
         
         # perform the segmentation; conjugate gradient with multigrid
         # preconditioner option (cg_mg), which is faster but req pyamg
@@ -106,7 +116,8 @@ def segment_rw(roi, channel, beta=50.0, vmin=0.6, vmax=0.65, remove_small=None,
             walker = morphology.remove_small_objects(walker, remove_small)
         if erosion:
             # attempt to reduce label connections by eroding
-            walker = morphology.erosion(walker, morphology.octahedron(erosion))
+            walker = ndimage.grey_erosion(
+                walker, footprint=morphology.octahedron(erosion))
         
         if get_labels:
             # label neighboring pixels to segmented regions
@@ -123,7 +134,7 @@ def segment_rw(roi, channel, beta=50.0, vmin=0.6, vmax=0.65, remove_small=None,
     return walkers
 
 
-def segment_ws(roi, channel, thresholded=None, blobs=None): 
+def segment_ws(roi, channel, thresholded=None, blobs=None, distance=None):
     """Segment an image using a compact watershed, including the option 
     to use a 3D-seeded watershed approach.
     
@@ -136,48 +147,70 @@ def segment_ws(roi, channel, thresholded=None, blobs=None):
         blobs: Blobs as a Numpy array in [[z, y, x, ...], ...] order, which 
             are used as seeds for the watershed. Defaults to None, in which 
             case peaks on a distance transform will be used.
+        distance (:obj:`np.ndarray`): Distance transform of the foreground
+            in ``thresholded``, such as one already computed by the caller,
+            to avoid recomputing it. Assumed to be of the same shape as each
+            ``roi`` channel. Defaults to None, in which case the distance
+            transform will be computed once for each channel and shared
+            between peak detection and the watershed.
     
     Returns:
         List of watershed labels for each given channel, with each set 
         of labels given as an image of the same shape as ``roi``.
     """
-    labels = []
     multichannel, channels = plot_3d.setup_channels(roi, channel, 3)
-    for i in channels:
-        roi_segment = roi[..., i] if multichannel else roi
-        if thresholded is None:
-            # Ostu thresholing and object separate based on local max 
-            # rather than seeded watershed approach
-            roi_thresh = filters.threshold_otsu(roi, 64)
-            thresholded = roi_segment > roi_thresh
-        else:
-            # r-w assigned 0 values to > 0 val labels
-            thresholded = thresholded[0] - 1
-        
-        if blobs is None:
-            # default to finding peaks of distance transform if no blobs 
-            # given, using an anisotropic footprint
-            try:
-                local_max = feature.peak_local_max(
-                    distance, indices=False, footprint=np.ones((1, 3, 3)), 
-                    labels=thresholded)
-            except IndexError as e:
-                print(e)
-                raise e
-            markers = measure.label(local_max)
-        else:
-            markers = _markers_from_blobs(thresholded, blobs)
-        
-        # watershed with slight increase in compactness to give basins with 
-        # more regular, larger shape
-        labels_ws = watershed_distance(thresholded, markers, compactness=0.1)
-        
-        # clean up segmentation
-        labels_ws = _carve_segs(labels_ws, blobs)
-        labels_ws = morphology.remove_small_objects(labels_ws, min_size=100)
-        #print("num ws blobs: {}".format(len(np.unique(labels_ws)) - 1))
-        labels_ws = labels_ws[None]
-        labels.append(labels_ws)
+    blobs_coords = None if blobs is None else _blobs_to_coords(blobs)
+    args = [(roi[..., i] if multichannel else roi, roi, thresholded, blobs,
+             blobs_coords, distance) for i in channels]
+    if len(args) > 1:
+        # segment channels in parallel threads since the distance transform
+        # and watershed release the GIL, avoiding copying the ROI to
+        # separate processes
+        with ThreadPoolExecutor(
+                min(len(args), os.cpu_count())) as executor:
+            labels = list(executor.map(_segment_ws_chl, *zip(*args)))
+    else:
+        labels = [_segment_ws_chl(*a) for a in args]
+    return labels
+
+
+def _segment_ws_chl(roi_segment, roi, thresholded, blobs, blobs_coords,
+                    distance):
+    # segment a single channel for segment_ws
+    if thresholded is None:
+        # Ostu thresholing and object separate based on local max 
+        # rather than seeded watershed approach
+        roi_thresh = filters.threshold_otsu(roi, 64)
+        thresholded = roi_segment > roi_thresh
+    else:
+        # r-w assigned 0 values to > 0 val labels
+        thresholded = thresholded[0] - 1
+    if distance is None:
+        distance = ndimage.distance_transform_edt(thresholded)
+    
+    if blobs is None:
+        # default to finding peaks of distance transform if no blobs 
+        # given, using an anisotropic footprint
+        try:
+            local_max = feature.peak_local_max(
+                distance, indices=False, footprint=np.ones((1, 3, 3)), 
+                labels=thresholded)
+        except IndexError as e:
+            print(e)
+            raise e
+        markers = measure.label(local_max)
+    else:
+        markers = _markers_from_blobs(thresholded, blobs_coords)
+    
+    # watershed with slight increase in compactness to give basins with 
+    # more regular, larger shape
+    labels_ws = watershed_distance(
+        thresholded, markers, compactness=0.1, distance=distance)
+    
+    # clean up segmentation
+    labels_ws = _carve_segs(labels_ws, blobs)
+    labels_ws = morphology.remove_small_objects(labels_ws, min_size=100)
+    #print("num ws blobs: {}".format(len(np.unique(labels_ws)) - 1))
     return labels_ws
 
 
@@ -524,7 +557,7 @@ def segment_from_labels(edges, markers, labels_img, atlas_img=None,
 
 
 def watershed_distance(foreground, markers=None, num_peaks=np.inf, 
-                       compactness=0, mask=None):
+                       compactness=0, mask=None, distance=None):
     """Perform watershed segmentation based on distance from foreground 
     to background.
     
@@ -542,12 +575,15 @@ def watershed_distance(foreground, markers=None, num_peaks=np.inf,
         mask: Boolean or binary array of same size as ``foreground`` 
             where True or 1 pixels will be filled by the watershed; 
             defaults to None to fill the whole image.
+        distance: Distance transform of ``foreground`` of the same shape;
+            defaults to None, in which case it will be computed here.
     
     Returns:
         The segmented image as an array of the same shape as that of 
         ``foreground``.
     """
-    distance = ndimage.distance_transform_edt(foreground)
+    if distance is None:
+        distance = ndimage.distance_transform_edt(foreground)
     if markers is None:
         # generate a limited number of markers from local peaks in the 
         # distance transform if markers are not given
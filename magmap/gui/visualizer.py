@@ -39,7 +39,7 @@ except AttributeError:
 from pyface.api import FileDialog, OK
 from traits.api import (HasTraits, Instance, on_trait_change, Button, Float,
                         Int, List, Array, Str, Bool, Any,
-                        push_exception_handler, Property, File)
+                        push_exception_handler, Property, File, Tuple)
 from traitsui.api import (View, Item, HGroup, VGroup, Tabbed, Handler,
                           RangeEditor, HSplit, TabularEditor, CheckListEditor, 
                           FileEditor, TextEditor, ArrayEditor, BooleanEditor)
@@ -139,9 +139,11 @@ class VisHandler(Handler):
                     or tab is ViewerTabs.ROI_ED and not info.object.roi_ed
                     or tab is ViewerTabs.ATLAS_ED and not info.object.atlas_eds
                     or tab is ViewerTabs.MAYAVI
-                    and not info.object.scene_3d_shown):
+                    and not info.object.scene_3d_shown
+                    and not info.object.is_3d_state_drawn()):
                 # redraw if the tab is stale, or the corresponding viewer
-                # has not been shown before
+                # has not been shown before; skip redrawing an empty 3D
+                # viewer if its settings have not changed since last drawn
                 info.object.redraw_selected_viewer(clear=False)
                 if tab is ViewerTabs.MAYAVI:
                     # initialize the camera orientation
@@ -334,6 +336,8 @@ class Visualization(HasTraits):
         x_offset: Integer trait for x-offset.
         y_offset: Integer trait for y-offset.
         z_offset: Integer trait for z-offset.
+        offset_tuple (Tuple[int, int, int]): Property of the offset in
+            x,y,z, which changes with any of the offset traits.
         scene: The main scene
         btn_redraw: Button editor for drawing the reiong of
             interest.
@@ -354,6 +358,8 @@ class Visualization(HasTraits):
             tab Enums to boolean value, where True indicates that the
             viewer's display is stale and should be refreshed when shown.
             Defaults to all viewers set to True.
+        _drawn_3d_state (tuple): The ROI state from :meth:`_get_3d_state`
+            when the 3D viewer was last drawn; defaults to None.
     """
     # File selection
 
@@ -382,6 +388,8 @@ class Visualization(HasTraits):
     x_offset = Int
     y_offset = Int
     z_offset = Int
+    offset_tuple = Property(
+        Tuple(Int, Int, Int), depends_on="x_offset,y_offset,z_offset")
     roi_array = Array(Int, shape=(1, 3), editor=ArrayEditor(format_str="%0d"))
 
     btn_redraw = Button("Redraw")
@@ -490,6 +498,7 @@ class Visualization(HasTraits):
     mpl_fig_active = Any
     scene = Instance(MlabSceneModel, ())
     scene_3d_shown = False  # 3D Mayavi display shown
+    _drawn_3d_state = None
     selected_viewer_tab = ViewerTabs.ROI_ED
     select_controls_tab = Int(-1)
 
@@ -1415,6 +1424,31 @@ class Visualization(HasTraits):
         if feedback:
             self._update_roi_feedback(" ".join(feedback), print_out=True)
         self.stale_viewers[ViewerTabs.MAYAVI] = False
+        self._drawn_3d_state = self._get_3d_state()
+    
+    def _get_3d_state(self):
+        """Get the settings that determine the 3D viewer display.
+        
+        Returns:
+            tuple: The ROI offset and size, 3D display options, and
+            selected channels.
+        
+        """
+        chls = config.channel
+        return (self._curr_offset(), tuple(self.roi_array[0].tolist()),
+                tuple(self._check_list_3d),
+                None if chls is None else tuple(chls))
+    
+    def is_3d_state_drawn(self):
+        """Check whether the 3D viewer has been drawn with the current
+        settings.
+        
+        Returns:
+            bool: True if the 3D viewer was last drawn with the settings
+            from :meth:`_get_3d_state`.
+        
+        """
+        return self._drawn_3d_state == self._get_3d_state()
     
     def show_label_3d(self, label_id):
         """Show 3D region of main image corresponding to label ID.
@@ -1617,12 +1651,14 @@ class Visualization(HasTraits):
         self._reset_segments()
         print("Changed channel to {}".format(config.channel))
     
-    @on_trait_change("x_offset,y_offset,z_offset")
+    def _get_offset_tuple(self):
+        return self.x_offset, self.y_offset, self.z_offset
+    
+    @on_trait_change("offset_tuple")
     def update_plot(self):
         """Shows the chosen offset when an offset slider is moved.
         """
-        print("x: {}, y: {}, z: {}".format(self.x_offset, self.y_offset, 
-                                           self.z_offset))
+        print("x: {}, y: {}, z: {}".format(*self.offset_tuple))
 
     def update_status_bar_msg(self, msg):
         """Update the message displayed in the status bar.
@@ -2219,7 +2255,7 @@ class Visualization(HasTraits):
     
     def _curr_offset(self):
         # get ROI offset in x,y,z; TODO: migrate to z,y,x
-        return self.x_offset, self.y_offset, self.z_offset
+        return self.offset_tuple
     
     def set_offset(self, offset):
         """Set the offset sliders.
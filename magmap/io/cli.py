@@ -115,14 +115,15 @@ def args_with_dict(args):
     parsed = []
     args_dict = {}
     for arg in args:
-        arg_split = arg.split("=")
-        for_dict = len(arg_split) > 1
-        vals = arg_split[1] if for_dict else arg
+        # partition rather than split since only the first "=" is needed
+        key, sep, vals = arg.partition("=")
+        for_dict = bool(sep)
+        if not for_dict: vals = arg
         vals_split = vals.split(",")
         if len(vals_split) > 1: vals = vals_split
         vals = libmag.get_int(vals)
         if for_dict:
-            args_dict[arg_split[0]] = vals
+            args_dict[key] = vals
         else:
             parsed.append(vals)
     parsed.append(args_dict)
@@ -158,10 +159,10 @@ def args_to_dict(args, keys_enum, args_dict=None, sep_args="=", sep_vals=","):
     by_position = True
     num_enums = len(keys_enum)
     for i, arg in enumerate(args):
-        arg_split = arg.split(sep_args)
-        len_arg_split = len(arg_split)
+        # partition rather than split since only the first separator is needed
+        key_str, sep, vals_str = arg.partition(sep_args)
         # assume by position until any keyword given
-        by_position = by_position and len_arg_split < 2
+        by_position = by_position and not sep
         key = None
         vals = arg
         if by_position:
@@ -173,13 +174,13 @@ def args_to_dict(args, keys_enum, args_dict=None, sep_args="=", sep_vals=","):
                       "position, skipping".format(keys_enum, arg))
                 continue
             key = keys_enum(n)
-        elif len_arg_split < 2:
+        elif not sep:
             print("parameter {} does not contain a keyword, skipping"
                   .format(arg))
         else:
             # assign based on keyword if its equivalent enum exists
-            vals = arg_split[1]
-            key_str = arg_split[0].upper()
+            vals = vals_str
+            key_str = key_str.upper()
             try:
                 key = keys_enum[key_str]
             except KeyError:
@@ -27,6 +27,10 @@ _ARITHMETIC_TASKS = {
     config.DFTasks.DIVIDE_COLS: np.divide,
 }
 
+#: tuple[str]: CSV file extensions, including compressed CSV files whose
+# compression Pandas infers from the extension; the first is the default.
+CSV_EXTS = (".csv", ".csv.gz", ".csv.bz2", ".csv.xz", ".csv.zip")
+
 
 def weight_mean(vals, weights):
     """Calculate the weighted arithmetic mean.
@@ -627,7 +631,8 @@ def data_frames_to_csv(data_frames, path=None, sort_cols=None, show=None):
         data_frames: List of data frames to concatenate, or a single 
             ``DataFrame``.
         path: Output path; defaults to None, in which case the data frame 
-            will not be saved.
+            will not be saved. Paths ending in a compressed CSV extension
+            in :const:`CSV_EXTS` are compressed accordingly.
         sort_cols: Column as a string of list of columns by which to sort; 
             defaults to None for no sorting.
         show: True or " " to print the data frame with a space-separated 
@@ -637,9 +642,8 @@ def data_frames_to_csv(data_frames, path=None, sort_cols=None, show=None):
     Returns:
         The combined data frame.
     """
-    ext = ".csv"
     if path:
-        if not path.endswith(ext): path += ext
+        if not path.endswith(CSV_EXTS): path += CSV_EXTS[0]
         libmag.backup_file(path)
     combined = data_frames
     if not isinstance(data_frames, pd.DataFrame):
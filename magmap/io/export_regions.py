@@ -6,7 +6,6 @@ Convert regions from ontology files or atlases to data frames.
 """
 import os
 import csv
-from collections import OrderedDict
 from time import time
 
 import SimpleITK as sitk
@@ -53,38 +52,44 @@ def export_region_ids(labels_ref_lookup, path, level):
         css = ["background-color: #{:02x}{:02x}{:02x}".format(*c) for c in s]
         return css
 
-    ext = ".csv"
-    path_csv = path if path.endswith(ext) else path + ext
-    
     # find parents for label at the given level
     parent_level = -1 if level is None else level
     label_parents = ontology.labels_to_parent(labels_ref_lookup, parent_level)
     
     cols = ["Region", "RegionAbbr", "RegionName", "Level", "Parent"]
-    data = OrderedDict()
     label_ids = sitk_io.find_atlas_labels(
         config.load_labels, level, labels_ref_lookup)
     cm = colormaps.get_labels_discrete_colormap(None, 0, use_orig_labels=True)
     rgbs = cm.cmap_labels
     if rgbs is not None:
         cols.append("RGB")
+    
+    # does not include laterality distinction, only using original IDs
+    inds, keys = [], []
     for i, key in enumerate(label_ids):
-        # does not include laterality distinction, only using original IDs
-        if key <= 0: continue
-        label = labels_ref_lookup[key]
+        if key > 0:
+            inds.append(i)
+            keys.append(key)
+    
+    # gather each column from the ontology nodes, looking up each node once
+    nodes = [labels_ref_lookup[key][ontology.NODE] for key in keys]
+    data = {
+        "Region": keys,
+        "RegionAbbr": [n[config.ABAKeys.ACRONYM.value] for n in nodes],
+        "RegionName": [n[config.ABAKeys.NAME.value] for n in nodes],
+        "Level": [n[config.ABAKeys.LEVEL.value] for n in nodes],
         # ID of parent at label_parents' level
-        parent = label_parents[key]
-        vals = [key, label[ontology.NODE][config.ABAKeys.ACRONYM.value],
-                label[ontology.NODE][config.ABAKeys.NAME.value],
-                label[ontology.NODE][config.ABAKeys.LEVEL.value], parent]
-        if rgbs is not None:
-            vals.append(rgbs[i, :3])
-        for col, val in zip(cols, vals):
-            data.setdefault(col, []).append(val)
-    df = df_io.dict_to_data_frame(data, path_csv)
+        "Parent": [label_parents[key] for key in keys],
+    }
+    if rgbs is not None:
+        data["RGB"] = list(rgbs[inds, :3])
+    df = df_io.data_frames_to_csv(pd.DataFrame(data, columns=cols), path)
     if rgbs is not None:
         df = df.style.apply(color_cells, subset="RGB")
-    path_xlsx = "{}.xlsx".format(os.path.splitext(path)[0])
+    # replace the full CSV extension, including any compression extension
+    ext = next((e for e in df_io.CSV_EXTS if path.endswith(e)), None)
+    path_base = path[:-len(ext)] if ext else os.path.splitext(path)[0]
+    path_xlsx = "{}.xlsx".format(path_base)
     df.to_excel(path_xlsx)
     print("exported regions to styled spreadsheet: \"{}\"".format(path_xlsx))
     return df
@@ -108,15 +113,15 @@ def export_region_network(labels_ref_lookup, path):
     ext = ".sif"
     if not path.endswith(ext): path += ext
     network = {}
-    for key in labels_ref_lookup.keys():
+    network_get = network.get
+    for key, label in labels_ref_lookup.items():
         if key < 0: continue  # only use original, non-neg region IDs
-        label = labels_ref_lookup[key]
         parents = label.get(ontology.PARENT_IDS)
         if parents:
             for parent in parents[::-1]:
                 # work backward since closest parent listed last
                 #print("{} looking for parent {} in network".format(key, parent))
-                network_parent = network.get(parent)
+                network_parent = network_get(parent)
                 if network_parent is not None:
                     # assume that all parents will have already been entered 
                     # into the network dict since the keys were entered in 
@@ -126,15 +131,17 @@ def export_region_network(labels_ref_lookup, path):
         # all regions have a node, even if connected to no one
         network[key] = []
     
-    with open(path, "w", newline="") as csv_file:
+    # each region will have a line along with any of its immediate children
+    rows = []
+    for key, children in network.items():
+        row = [str(key)]
+        if children:
+            row.extend(["pp", *children])
+        rows.append(row)
+    with open(path, "w", newline="", buffering=1 << 20) as csv_file:
+        # write all rows at once through a large buffer
         stats_writer = csv.writer(csv_file, delimiter=" ")
-        # each region will have a line along with any of its immediate children
-        for key in network.keys():
-            children = network[key]
-            row = [str(key)]
-            if children:
-                row.extend(["pp", *children])
-            stats_writer.writerow(row)
+        stats_writer.writerows(rows)
     print("exported region network: \"{}\"".format(path))
 
 
@@ -152,18 +159,32 @@ def export_common_labels(img_paths, output_path):
         cells where 1 indicates that the given atlas has the corresponding 
         label.
     """
-    labels_dict = {}
+    atlas_names = []
+    labels = [np.array([], dtype=int)]
+    names = [np.array([], dtype=str)]
     for img_path in img_paths:
         name = libmag.get_filename_without_ext(img_path)
         labels_np = sitk_io.load_registered_img(
             img_path, config.RegNames.IMG_LABELS.value)
-        # only use pos labels since assume neg labels are merely mirrored
-        labels_unique = np.unique(labels_np[labels_np >= 0])
-        labels_dict[name] = pd.Series(
-            np.ones(len(labels_unique), dtype=int), index=labels_unique)
-    df = pd.DataFrame(labels_dict)
-    df.sort_index()
-    df.to_csv(output_path)
+        # only use pos labels since assume neg labels are merely mirrored;
+        # filter the unique labels rather than copying the image's pos
+        # labels, finding unique labels by binning when possible
+        labels_unique = colormaps.unique_labels(labels_np)
+        labels_unique = labels_unique[labels_unique >= 0]
+        atlas_names.append(name)
+        labels.append(labels_unique)
+        names.append(np.repeat(name, len(labels_unique)))
+    # tabulate label presence across all atlases at once rather than
+    # aligning a separate series for each atlas; keep atlases in the given
+    # order and leave absent labels empty
+    df = pd.crosstab(np.concatenate(labels), np.concatenate(names))
+    df = df.reindex(columns=atlas_names).clip(upper=1)
+    df = df.where(df > 0)
+    df.index.name = None
+    df.columns.name = None
+    df.sort_index(inplace=True)
+    # write in row chunks, compressing if given a compressed CSV extension
+    df.to_csv(output_path, chunksize=10000, compression="infer")
     print("common labels exported to {}".format(output_path))
     return df
 
@@ -202,7 +223,8 @@ def make_density_image(img_path, scale=None, shape=None, suffix=None,
     if labels_img_sitk is None:
         labels_img_sitk = sitk_io.load_registered_img(
             mod_path, config.RegNames.IMG_LABELS.value, get_sitk=True)
-    labels_img = sitk.GetArrayFromImage(labels_img_sitk)
+    # read-only view of the labels, which are only used to look up blobs
+    labels_img = sitk.GetArrayViewFromImage(labels_img_sitk)
     # load blobs
     blobs, scaling, _ = np_io.load_blobs(
         img_path, True, labels_img.shape, scale)
@@ -212,25 +234,42 @@ def make_density_image(img_path, scale=None, shape=None, suffix=None,
         labels_spacing = np.multiply(
             labels_img_sitk.GetSpacing()[::-1], 
             np.divide(labels_img.shape, shape))
-        labels_img = np.zeros(shape, dtype=labels_img.dtype)
+        # placeholder for the final shape; broadcast a single value to
+        # avoid allocating a full image
+        labels_img = np.broadcast_to(
+            np.zeros(1, dtype=labels_img.dtype), tuple(shape))
         labels_img_sitk.SetSpacing(labels_spacing[::-1])
-    print("using scaling: {}".format(scaling))
+    libmag.printv_format("using scaling: {}", (scaling, ))
     # annotate blobs based on position
     blobs_ids, coord_scaled = ontology.get_label_ids_from_position(
         blobs[:, :3], labels_img, scaling, 
         return_coord_scaled=True)
-    print("blobs_ids: {}".format(blobs_ids))
+    # format the potentially large array of IDs only if verbose
+    libmag.printv_format("blobs_ids: {}", (blobs_ids, ))
     
     # build heat map to store densities per label px and save to file
     heat_map = cv_nd.build_heat_map(labels_img.shape, coord_scaled)
     out_path = sitk_io.reg_out_path(
         mod_path, config.RegNames.IMG_HEAT_MAP.value)
-    print("writing {}".format(out_path))
+    libmag.printv_format("writing {}", (out_path, ))
     heat_map_sitk = sitk_io.replace_sitk_with_numpy(labels_img_sitk, heat_map)
     sitk.WriteImage(heat_map_sitk, out_path, False)
     return heat_map, blobs_ids, img_path
 
 
+def _make_density_image_mp(args):
+    """Wrapper for :func:`make_density_image` that takes its arguments as
+    a single sequence for :meth:`multiprocessing.Pool.imap_unordered`.
+    
+    Args:
+        args (Sequence): Arguments to :func:`make_density_image`.
+    
+    Returns:
+        The output from :func:`make_density_image`.
+    """
+    return make_density_image(*args)
+
+
 def make_density_images_mp(img_paths, scale=None, shape=None, suffix=None):
     """Make density images for a list of files as a multiprocessing 
     wrapper for :func:``make_density_image``
@@ -248,17 +287,29 @@ def make_density_images_mp(img_paths, scale=None, shape=None, suffix=None):
             defaults to None.
     """
     start_time = time()
-    pool = chunking.get_mp_pool()
-    pool_results = []
-    for img_path in img_paths:
-        print("making image", img_path)
-        pool_results.append(pool.apply_async(
-            make_density_image, args=(img_path, scale, shape, suffix)))
-    for result in pool_results:
-        _, _, path = result.get()
+    args = [(img_path, scale, shape, suffix) for img_path in img_paths]
+    if len(args) == 1:
+        # make a single image directly to avoid the overhead of a pool
+        print("making image", img_paths[0])
+        _, _, path = _make_density_image_mp(args[0])
         print("finished {}".format(path))
-    pool.close()
-    pool.join()
+    else:
+        # start no more processes than images
+        pool = chunking.get_mp_pool(max_procs=len(args))
+        try:
+            for img_path in img_paths:
+                print("making image", img_path)
+            # report each image as soon as it finishes rather than in order
+            for _, _, path in pool.imap_unordered(
+                    _make_density_image_mp, args):
+                print("finished {}".format(path))
+            pool.close()
+        except BaseException:
+            # stop remaining workers promptly rather than waiting for them
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
     print("time elapsed for making density images:", time() - start_time)
 
 
@@ -293,7 +344,8 @@ def make_labels_diff_img(img_path, df_path, meas, fn_avg, prefix=None,
     reg_name = (config.RegNames.IMG_LABELS.value if level is None 
                 else config.RegNames.IMG_LABELS_LEVEL.value.format(level))
     labels_sitk = sitk_io.load_registered_img(img_path, reg_name, get_sitk=True)
-    labels_np = sitk.GetArrayFromImage(labels_sitk)
+    # view rather than copy the labels since the map is a new array
+    labels_np = sitk.GetArrayViewFromImage(labels_sitk)
     df = pd.read_csv(df_path)
     labels_diff = vols.map_meas_to_labels(
         labels_np, df, meas, fn_avg, reverse=True, col_wt=col_wt)
@@ -333,26 +385,32 @@ def make_labels_level_img(img_path, level, prefix=None, show=False):
     # load original labels image and setup ontology dictionary
     labels_sitk = sitk_io.load_registered_img(
         img_path, config.RegNames.IMG_LABELS.value, get_sitk=True)
-    labels_np = sitk.GetArrayFromImage(labels_sitk)
-    ref = ontology.load_labels_ref(config.load_labels)
-    labels_ref_lookup = ontology.create_aba_reverse_lookup(ref)
+    # view the labels since mapping them to parents makes a new array
+    labels_np = sitk.GetArrayViewFromImage(labels_sitk)
+    labels_ref_lookup = ontology.load_aba_reverse_lookup(config.load_labels)
     
-    ids = list(labels_ref_lookup.keys())
-    for key in ids:
-        keys = [key, -1 * key]
-        for region in keys:
-            if region == 0: continue
-            # get ontological label
-            label = labels_ref_lookup[abs(region)]
-            label_level = label[ontology.NODE][config.ABAKeys.LEVEL.value]
-            if label_level == level:
-                # get children (including parent first) at given level 
-                # and replace them with parent
-                label_ids = ontology.get_children_from_id(
-                    labels_ref_lookup, region)
-                labels_region = np.isin(labels_np, label_ids)
-                print("replacing labels within", region)
-                labels_np[labels_region] = region
+    children = []
+    parents = []
+    for key, label in labels_ref_lookup.items():
+        # only use original, pos region IDs, mirroring them for neg IDs
+        if key <= 0: continue
+        label_level = label[ontology.NODE][config.ABAKeys.LEVEL.value]
+        if label_level == level:
+            # get children (including parent first) at given level once
+            # for both sides to replace them with parent
+            label_ids = np.array(ontology.get_children_from_id(
+                labels_ref_lookup, key))
+            print("replacing labels within", key, "and", -key)
+            children.extend((label_ids, -label_ids))
+            parents.extend((np.full(len(label_ids), key),
+                            np.full(len(label_ids), -key)))
+    if children:
+        children = np.concatenate(children)
+        parents = np.concatenate(parents)
+    # replace all children with their parents in a single pass through the
+    # image rather than once per parent since children of separate parents
+    # at the same level do not overlap
+    labels_np = cv_nd.map_labels(labels_np, children, parents)
     labels_level_sitk = sitk_io.replace_sitk_with_numpy(labels_sitk, labels_np)
     
     # generate an edge image at this level
@@ -6,10 +6,11 @@
 import os
 import glob
 
+import imageio
 import numpy as np
+from matplotlib import pyplot as plt
 from skimage import transform
 from skimage import io
-from matplotlib import animation
 from scipy import ndimage
 
 from magmap.cv import chunking
@@ -22,13 +23,25 @@ from magmap.plot import plot_3d
 from magmap.plot import plot_support
 
 
+#: Dict[Tuple[float], :obj:`matplotlib.figure.Figure`]: Figures reused
+# across single plane exports, keyed by figure size.
+_figs = {}
+
+#: int: Maximum number of figures to keep in :attr:`_figs`.
+_FIGS_MAX = 4
+
+
 class StackPlaneIO(object):
     """Worker class to export planes from a stack with support for 
     multiprocessing.
     
+    Data set as class attributes are inherited by forked workers. In
+    other start methods, planes are passed directly to the worker functions.
+    
     Attributes:
         imgs: A list of images, with exact specification determined by 
-            the calling function.
+            the calling function. Only accessed if planes are not passed
+            to the worker functions.
     """
     imgs = None
     
@@ -38,31 +51,39 @@ class StackPlaneIO(object):
         cls.imgs = imgs
     
     @classmethod
-    def import_img(cls, i, rescale, multichannel):
-        """Import and rescale an image.
+    def _get_planes(cls, i, planes):
+        """Get the corresponding planes from each image."""
+        if planes is None:
+            planes = [img_stack[i] for img_stack in cls.imgs]
+        return planes
+    
+    @classmethod
+    def import_img(cls, i, target_size, planes=None):
+        """Import and resize an image.
         
-        Assumes that :attr:``imgs`` is a list of paths to 2D images.
+        Assumes that :attr:``imgs`` is a list containing a list of paths
+        to 2D images.
         
         Args:
             i: Index within :attr:``imgs`` to plot.
-            rescale: Rescaling multiplier.
-            multichannel: True if the images are multichannel.
+            target_size: Resize to this shape.
+            planes: List with the path to the image; defaults to None to
+                get the path from :attr:``imgs``.
         
         Returns:
-            A tuple of ``i`` and a list of the processed images. The 
-            processed image list has the same length as :attr:``imgs``, 
-            or the number of image paths.
+            A tuple of ``i`` and a list with the processed image.
         """
-        path = cls.imgs[i]
+        path = cls._get_planes(i, planes)[0]
         print("importing {}".format(path))
         img = io.imread(path)
-        img = transform.rescale(
-            img, rescale, mode="reflect", multichannel=multichannel, 
+        # resize in single rather than default double precision
+        img = transform.resize(
+            img.astype(np.float32, copy=False), target_size, mode="reflect",
             preserve_range=True, anti_aliasing=True)
-        return i, img
+        return i, [img]
     
     @classmethod
-    def process_plane(cls, i, target_size, rotate=None):
+    def process_plane(cls, i, target_size, planes=None, rotate=None):
         """Process corresponding planes from related images.
         
         Assumes that :attr:``imgs`` is a list of nested 2D image lists, 
@@ -73,6 +94,8 @@ class StackPlaneIO(object):
         Args:
             i: Index within nested lists of :attr:``imgs`` to plot.
             target_size: Resize to this shape.
+            planes: List of the ``i``th plane from each image; defaults to
+                None to get the planes from :attr:``imgs``.
             rotate: Degrees by which to rotate; defaults to None.
         
         Returns:
@@ -82,17 +105,25 @@ class StackPlaneIO(object):
         """
         print("processing plane {}".format(i))
         imgs_proc = []
-        for j, img_stack in enumerate(cls.imgs):
-            if j == 0:
-                # atlas image
+        for j, plane in enumerate(cls._get_planes(i, planes)):
+            if plane.shape[:2] == tuple(target_size):
+                # copy without resizing if already at the target size
+                img = plane.astype(
+                    np.float32 if j == 0 else plane.dtype, copy=True)
+            elif j == 0:
+                # atlas image, resized in single rather than default double
+                # precision; keep as float rather than quantizing to uint8
+                # since display applies per-channel intensity limits
                 img = transform.resize(
-                    img_stack[i], target_size, mode="reflect",
-                    preserve_range=True, anti_aliasing=True)
+                    plane.astype(np.float32, copy=False), target_size,
+                    mode="reflect", preserve_range=True, anti_aliasing=True)
             else:
                 # labels-based image, using nearest-neighbor interpolation
+                # and restoring its original integer type
                 img = transform.resize(
-                    img_stack[i], target_size, mode="reflect",
-                    preserve_range=True, anti_aliasing=False, order=0)
+                    plane, target_size, mode="reflect",
+                    preserve_range=True, anti_aliasing=False,
+                    order=0).astype(plane.dtype, copy=False)
             imgs_proc.append(img)
         if rotate:
             # rotate, filling background with edge color
@@ -106,9 +137,42 @@ class StackPlaneIO(object):
         return i, imgs_proc
 
 
+def _get_fig(size=None):
+    """Get a cleared figure with a single subplot, reusing the figure
+    from a prior call with the same size.
+    
+    Args:
+        size (List[float]): Sequence of figure size in ``(width, height)``
+            in inches; defaults to None to use the Matplotlib default size.
+    
+    Returns:
+        :obj:`matplotlib.figure.Figure`, :obj:`matplotlib.axes.Axes`: The
+        figure and its subplot.
+    
+    """
+    key = None if size is None else tuple(size)
+    fig = _figs.get(key)
+    if fig is None:
+        if len(_figs) >= _FIGS_MAX:
+            # close the earliest figure to limit the number of open figures
+            plt.close(_figs.pop(next(iter(_figs))))
+        fig, gs = plot_support.setup_fig(1, 1, size)
+        _figs[key] = fig
+    else:
+        # clear the prior plot, including any colorbar, and restore the
+        # size changed when fitting the frame to the prior image
+        fig.clf()
+        fig.set_size_inches(
+            size if size is not None else plt.rcParams["figure.figsize"])
+    ax = fig.add_subplot(1, 1, 1)
+    return fig, ax
+
+
 def _build_stack(ax, images, process_fnc, rescale=1, aspect=None, 
-                 origin=None, cmaps_labels=None, scale_bar=True):
-    """Builds an animated GIF from a stack of images.
+                 origin=None, cmaps_labels=None, scale_bar=True, fit=False,
+                 writer=None):
+    """Builds a stack of images as Matplotlib artists, optionally streaming
+    each plane as a frame to an animation writer.
     
     Uses multiprocessing to load or resize each image.
     
@@ -126,11 +190,19 @@ def _build_stack(ax, images, process_fnc, rescale=1, aspect=None,
             defaults to None. Length should be equal to that of 
             ``images`` - 1.
         scale_bar: True to include scale bar; defaults to True.
+        fit (bool): True to fit the figure frame to the first plane's
+            first available image; defaults to False.
+        writer: Animation writer from :func:`setup_anim_writer`; defaults
+            to None. If given, each plane is rendered and written as a
+            frame as soon as it is available, and its artists are removed
+            once the next plane is plotted so that only a single plane's
+            artists are held at a time.
     
     Returns:
         :List[List[:obj:`matplotlib.image.AxesImage`]]: Nested list of 
         axes image objects. The first list level contains planes, and
-        the second level are channels within each plane.
+        the second level are channels within each plane. If ``writer``
+        is given, only the final plane's artists are included.
     """
     # number of image types (eg atlas, labels) and corresponding planes
     num_image_types = len(images)
@@ -140,64 +212,123 @@ def _build_stack(ax, images, process_fnc, rescale=1, aspect=None,
     
     # Matplotlib figure for building the animation
     plot_support.hide_axes(ax)
+    if scale_bar:
+        # add before any frames are written
+        plot_support.add_scale_bar(ax, 1 / rescale, config.plane)
     
     # import the images as Matplotlib artists via multiprocessing
-    plotted_imgs = [None] * num_images
+    plotted_imgs = []
     img_shape = images[0][0].shape
     target_size = np.multiply(img_shape, rescale).astype(int)
     multichannel = images[0][0].ndim >= 3
     if multichannel:
         print("building stack for channel: {}".format(config.channel))
         target_size = target_size[:-1]
-    StackPlaneIO.set_data(images)
-    pool = chunking.get_mp_pool()
-    pool_results = []
-    for i in range(num_images):
-        # add rotation argument if necessary
-        pool_results.append(
-            pool.apply_async(process_fnc, args=(i, target_size)))
+    pool = None
+    if (rescale == 1 and process_fnc == StackPlaneIO.process_plane
+            and all(img[0].shape[:2] == tuple(target_size) for img in images)):
+        # planes only need to be copied, so process them here rather than
+        # transferring each plane to and from worker processes
+        results = (process_fnc(i, target_size, [img[i] for img in images])
+                   for i in range(num_images))
+    else:
+        # pass an index to access each plane in forked workers to minimize
+        # pickling, or pass the planes themselves for other start methods
+        is_fork = chunking.is_fork()
+        if is_fork:
+            StackPlaneIO.set_data(images)
+        pool = chunking.get_mp_pool()
+        pool_results = []
+        for i in range(num_images):
+            # add rotation argument if necessary
+            args = [i, target_size]
+            if not is_fork:
+                args.append([img[i] for img in images])
+            pool_results.append(pool.apply_async(process_fnc, args=args))
+        pool.close()
+        results = (result.get() for result in pool_results)
     
-    # setup imshow parameters
+    # setup imshow parameters, resolving the main image's colormaps once
+    # rather than for each plane
     colorbar = config.roi_profile["colorbar"]
-    cmaps_all = [config.cmaps, *cmaps_labels]
+    cmaps_all = [
+        [colormaps.get_cmap(cmap) for cmap in config.cmaps], *cmaps_labels]
 
-    img_size = None
-    for result in pool_results:
-        i, imgs = result.get()
-        if img_size is None: img_size = imgs[0].shape
+    try:
+        for i, imgs in results:
         
-        # multiple artists can be shown at each frame by collecting 
-        # each group of artists in a list; overlay_images returns 
-        # a nested list containing a list for each image, which in turn 
-        # contains a list of artists for each channel
-        ax_imgs = plot_support.overlay_images(
-            ax, aspect, origin, imgs, None, cmaps_all, ignore_invis=True,
-            check_single=True)
-        if colorbar and len(ax_imgs) > 0 and len(ax_imgs[0]) > 0:
-            # add colorbar with scientific notation if outside limits
-            cbar = ax.figure.colorbar(ax_imgs[0][0], ax=ax, shrink=0.7)
-            plot_support.set_scinot(cbar.ax, lbls=None, units=None)
-        plotted_imgs[i] = np.array(ax_imgs).flatten()
-    pool.close()
-    pool.join()
-    
-    if scale_bar:
-        plot_support.add_scale_bar(ax, 1 / rescale, config.plane)
+            # multiple artists can be shown at each frame by collecting 
+            # each group of artists in a list; overlay_images returns 
+            # a nested list containing a list for each image, which in turn 
+            # contains a list of artists for each channel
+            ax_imgs = plot_support.overlay_images(
+                ax, aspect, origin, imgs, None, cmaps_all, ignore_invis=True,
+                check_single=True)
+            first = not plotted_imgs
+            if first:
+                if colorbar and len(ax_imgs) > 0 and len(ax_imgs[0]) > 0:
+                    # add colorbar with scientific notation if outside limits
+                    cbar = ax.figure.colorbar(ax_imgs[0][0], ax=ax, shrink=0.7)
+                    plot_support.set_scinot(cbar.ax, lbls=None, units=None)
+                if fit:
+                    _fit_frame(np.array(ax_imgs).flatten(), aspect)
+            elif writer is not None:
+                # remove the prior plane's artists, already written as a frame
+                for ax_img in plotted_imgs.pop():
+                    if ax_img is not None: ax_img.remove()
+            plotted_imgs.append(np.array(ax_imgs).flatten())
+            if writer is not None:
+                _write_frame(ax.figure, writer)
+    except BaseException:
+        if pool is not None:
+            # stop remaining workers promptly rather than waiting for them
+            pool.terminate()
+        raise
+    finally:
+        if pool is not None:
+            pool.join()
     
     return plotted_imgs
 
 
-def animate_imgs(base_path, plotted_imgs, delay, ext=None, suffix=None):
-    """Export to an animated image.
+def _fit_frame(ax_imgs, aspect):
+    """Fit the figure frame to the first available image.
+    
+    Args:
+        ax_imgs (List[:obj:`matplotlib.image.AxesImage`]): Sequence of
+            images, which may include None for images with alpha set to 0.
+        aspect (float): Aspect ratio.
+
+    """
+    for ax_img in ax_imgs:
+        if ax_img is not None:
+            plot_support.fit_frame_to_image(
+                ax_img.figure, ax_img.get_array().shape, aspect)
+            break
+
+
+def _write_frame(fig, writer):
+    """Render a figure and write it as a frame to an animation writer.
+    
+    Args:
+        fig (:obj:`matplotlib.figure.Figure`): Figure to render.
+        writer: Animation writer from :func:`setup_anim_writer`.
+
+    """
+    fig.canvas.draw()
+    # copy the RGB channels since the canvas buffer is reused for each draw
+    writer.append_data(np.array(fig.canvas.buffer_rgba())[..., :3])
+
+
+def setup_anim_writer(base_path, delay, ext=None, suffix=None):
+    """Set up a writer for an animated image.
     
     Defaults to an animated GIF unless ``ext`` specifies otherwise.
-    Requires ``FFMpeg`` for MP4 file format exports and ``ImageMagick`` for
-    all other types of exports.
+    Frames are encoded directly through ``imageio``, which requires the
+    ``imageio-ffmpeg`` package for MP4 file format exports.
     
     Args:
         base_path (str): String from which an output path will be constructed.
-        plotted_imgs (List[:obj:`matplotlib.image.AxesImage]): Sequence of
-            images to include in the animation.
         delay (int): Delay between image display in ms. If None, the delay will
             defaul to 100ms.
         ext (str): Extension to use when saving, without the period. Defaults
@@ -205,6 +336,11 @@ def animate_imgs(base_path, plotted_imgs, delay, ext=None, suffix=None):
         suffix (str): String to append to output path before extension;
             defaults to None to ignore.
 
+    Returns:
+        Tuple of the ``imageio`` writer, which should be closed after all
+        frames are appended, and the output path. The writer is None if
+        no writer is available for the given format.
+
     """
     if ext is None: ext = "gif"
     out_path = libmag.combine_paths(base_path, "animated", ext=ext)
@@ -212,20 +348,23 @@ def animate_imgs(base_path, plotted_imgs, delay, ext=None, suffix=None):
     libmag.backup_file(out_path)
     if delay is None:
         delay = 100
-    if plotted_imgs and len(plotted_imgs[0]) > 0:
-        fig = plotted_imgs[0][0].figure
-    else:
-        libmag.warn("No images available to animate")
-        return
-    anim = animation.ArtistAnimation(
-        fig, plotted_imgs, interval=delay, repeat_delay=0, blit=False)
+    kwargs = {"fps": 1000 / delay}
+    if ext == "mp4":
+        # request the plugin explicitly so that a missing backend fails here
+        # rather than falling back to a plugin that fails on the first frame
+        kwargs["format"] = "FFMPEG"
+        # avoid resizing frames to multiples of the default block size
+        kwargs["macro_block_size"] = 1
+    elif ext == "gif":
+        # loop indefinitely
+        kwargs["loop"] = 0
     try:
-        writer = "ffmpeg" if ext == "mp4" else "imagemagick"
-        anim.save(out_path, writer=writer)
-        print("saved animation file to {}".format(out_path))
-    except ValueError as e:
+        writer = imageio.get_writer(out_path, **kwargs)
+    except (ImportError, RuntimeError, ValueError) as e:
         print(e)
-        libmag.warn("No animation writer available for Matplotlib")
+        libmag.warn("No animation writer available for {}".format(out_path))
+        writer = None
+    return writer, out_path
 
 
 def _setup_labels_cmaps(imgs, cmaps_labels=None):
@@ -257,7 +396,8 @@ def _setup_labels_cmaps(imgs, cmaps_labels=None):
 
 def stack_to_ax_imgs(ax, image5d, path=None, offset=None, roi_size=None,
                      slice_vals=None, rescale=None, labels_imgs=None,
-                     multiplane=False, fit=False):
+                     multiplane=False, fit=False, writer=None,
+                     cmaps_labels=None):
     """Export a stack of images in a directory or a single volumetric image
     and associated labels images to :obj:`matplotlib.image.AxesImage`
     objects for export.
@@ -284,6 +424,13 @@ def stack_to_ax_imgs(ax, image5d, path=None, offset=None, roi_size=None,
         multiplane: True to extract the images as an animated GIF or movie 
             file; False to extract a single plane only. Defaults to False.
         fit (bool): True to fit the figure frame to the resulting image.
+        writer: Animation writer from :func:`setup_anim_writer` to which
+            each plane will be written as a frame; defaults to None.
+        cmaps_labels (List[:obj:`colormaps.DiscreteColormap`]): Sequence of
+            colormaps corresponding to ``labels_imgs``, such as those
+            from a prior call with the same labels images, to avoid finding
+            the unique labels again. Defaults to None to generate them from
+            ``labels_imgs``.
     
     Returns:
         List[:obj:`matplotlib.image.AxesImage`]: List of image objects.
@@ -327,7 +474,6 @@ def stack_to_ax_imgs(ax, image5d, path=None, offset=None, roi_size=None,
         rescale = 1.0
     aspect = None
     origin = None
-    cmaps_labels = []
     extracted_planes = []
     if path and os.path.isdir(path):
         # builds animations from all files in a directory
@@ -342,7 +488,8 @@ def stack_to_ax_imgs(ax, image5d, path=None, offset=None, roi_size=None,
         if labels_imgs is not None:
             for img in labels_imgs:
                 if img is not None: imgs.append(img[None])
-            _setup_labels_cmaps(imgs, cmaps_labels)
+            if cmaps_labels is None:
+                cmaps_labels = _setup_labels_cmaps(imgs)
         main_shape = None  # z,y,x shape of 1st image
         for img in imgs:
             sl = img_sl
@@ -368,21 +515,13 @@ def stack_to_ax_imgs(ax, image5d, path=None, offset=None, roi_size=None,
         fnc = StackPlaneIO.process_plane
     
     # export planes
+    if cmaps_labels is None:
+        cmaps_labels = []
     plotted_imgs = _build_stack(
         ax, extracted_planes, fnc, rescale, aspect=aspect, 
         origin=origin, cmaps_labels=cmaps_labels,
-        scale_bar=config.plot_labels[config.PlotLabels.SCALE_BAR])
-    
-    if fit and plotted_imgs:
-        # fit frame to first plane's first available image
-        ax_img = None
-        for ax_img in plotted_imgs[0]:
-            # images may be None if alpha set to 0
-            if ax_img is not None: break
-        if ax_img is not None:
-            plot_support.fit_frame_to_image(
-                ax_img.figure, ax_img.get_array().shape, aspect)
-    
+        scale_bar=config.plot_labels[config.PlotLabels.SCALE_BAR], fit=fit,
+        writer=writer)
     return plotted_imgs
 
 
@@ -416,28 +555,45 @@ def stack_to_img(paths, roi_offset, roi_size, series=None, subimg_offset=None,
     ncols, nrows = size if size else (1, 1)
     fig, gs = plot_support.setup_fig(
         nrows, ncols, config.plot_labels[config.PlotLabels.SIZE])
+    path_base = paths[0]
+    writer = None
+    if animated:
+        # stream frames directly to file as they are rendered
+        writer, out_path = setup_anim_writer(
+            path_base, config.delay, config.savefig, suffix)
+        if writer is None: return
     plotted_imgs = None
     num_paths = len(paths)
-    for i in range(nrows):
-        for j in range(ncols):
-            n = i * ncols + j
-            if n >= num_paths: break
-            ax = fig.add_subplot(gs[i, j])
-            path_sub = paths[n]
-            # TODO: test directory of images
-            # TODO: avoid reloading first image
-            np_io.setup_images(path_sub, series, subimg_offset, subimg_size)
-            plotted_imgs = stack_to_ax_imgs(
-                ax, config.image5d, path_sub, offset=roi_offset,
-                roi_size=roi_size, slice_vals=config.slice_vals, 
-                rescale=config.transform[config.Transforms.RESCALE],
-                labels_imgs=(config.labels_img, config.borders_img), 
-                multiplane=animated, 
-                fit=(size is None or ncols * nrows == 1))
-    path_base = paths[0]
+    try:
+        for i in range(nrows):
+            for j in range(ncols):
+                n = i * ncols + j
+                if n >= num_paths: break
+                ax = fig.add_subplot(gs[i, j])
+                path_sub = paths[n]
+                # TODO: test directory of images
+                # TODO: avoid reloading first image
+                np_io.setup_images(
+                    path_sub, series, subimg_offset, subimg_size)
+                # animate the last path's planes only, with prior paths
+                # shown as static images
+                plotted_imgs = stack_to_ax_imgs(
+                    ax, config.image5d, path_sub, offset=roi_offset,
+                    roi_size=roi_size, slice_vals=config.slice_vals, 
+                    rescale=config.transform[config.Transforms.RESCALE],
+                    labels_imgs=(config.labels_img, config.borders_img), 
+                    multiplane=animated, 
+                    fit=(size is None or ncols * nrows == 1),
+                    writer=writer if n == num_paths - 1 else None)
+    finally:
+        # close the writer even if rendering fails to release the file
+        if writer is not None:
+            writer.close()
     if animated:
-        animate_imgs(
-            path_base, plotted_imgs, config.delay, config.savefig, suffix)
+        if plotted_imgs:
+            print("saved animation file to {}".format(out_path))
+        else:
+            libmag.warn("No images available to animate")
     else:
         planei = roi_offset[-1] if roi_offset else config.slice_vals[0]
         if num_paths > 1:
@@ -464,25 +620,22 @@ def reg_planes_to_img(imgs, path=None, ax=None):
         path (str): Output base path, which will be combined with
             :attr:`config.savefig`; defaults to None to not save.
         ax (:obj:`matplotlib.image.Axes`): Axes on which to plot; defaults
-            to False, in which case a new figure and axes will be generated.
+            to False, in which case a figure from a prior call will be
+            cleared and reused, or a new figure will be generated.
 
     """
     if ax is None:
-        # set up new figure with single subplot
-        fig, gs = plot_support.setup_fig(
-            1, 1, config.plot_labels[config.PlotLabels.SIZE])
-        ax = fig.add_subplot(gs[0, 0])
+        # set up figure with single subplot
+        fig, ax = _get_fig(config.plot_labels[config.PlotLabels.SIZE])
     imgs = [img[None] for img in imgs]
     cmaps_labels = _setup_labels_cmaps(imgs)
     plotted_imgs = _build_stack(
         ax, imgs, StackPlaneIO.process_plane,
         cmaps_labels=cmaps_labels, scale_bar=False)
-    ax_img = plotted_imgs[0][0]
     aspect, origin = plot_support.get_aspect_ratio(config.plane)
-    plot_support.fit_frame_to_image(
-        ax_img.figure, ax_img.get_array().shape, aspect)
+    _fit_frame(plotted_imgs[0], aspect)
     if path:
-        plot_support.save_fig(path, config.savefig)
+        plot_support.save_fig(path, config.savefig, fig=ax.figure)
 
 
 def export_planes(image5d, prefix, ext, channel=None):
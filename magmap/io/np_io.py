@@ -356,7 +356,6 @@ def setup_images(path=None, series=None, offset=None, size=None,
 
     # add any additional image5d thresholds for multichannel images, such 
     # as those loaded without metadata for these settings
-    colormaps.setup_cmaps()
     num_channels = get_num_channels(config.image5d)
     config.near_max = libmag.pad_seq(config.near_max, num_channels, -1)
     config.near_min = libmag.pad_seq(config.near_min, num_channels, 0)
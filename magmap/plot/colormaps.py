@@ -3,6 +3,9 @@
 """Custom colormaps for MagellanMapper.
 """
 
+import copy
+import hashlib
+import warnings
 from enum import Enum, auto
 
 import numpy as np
@@ -12,15 +15,142 @@ from matplotlib import colors
 from magmap.settings import config
 from magmap.io import libmag
 
+try:
+    import fastremap
+except ImportError as e:
+    fastremap = None
+    warnings.warn(config.WARN_IMPORT_FASTREMAP, ImportWarning)
+
+class _LazyCmaps(dict):
+    """Dictionary of default colormaps that makes each colormap on first
+    access."""
+    #: Dict[:class:`config.Cmaps`, str]: End color for each default colormap.
+    _COLORS = {
+        config.Cmaps.CMAP_GRBK_NAME: "green",
+        config.Cmaps.CMAP_RDBK_NAME: "red",
+    }
+    
+    def __missing__(self, key):
+        cmap = make_dark_linear_cmap(key.value, self._COLORS[key])
+        self[key] = cmap
+        return cmap
+
+
 #: Dict[:class:`config.Cmaps`, :obj:`colors.LinearSegmentedColormap`]:
-# Default colormaps.
-CMAPS = {}
+# Default colormaps, made on first access.
+CMAPS = _LazyCmaps()
+
+#: Dict[Tuple, :obj:`DiscreteColormap`]: Labels colormaps from
+# :func:`get_labels_discrete_colormap` keyed by labels image content and
+# colormap settings.
+_labels_cmaps = {}
+
+#: int: Maximum number of colormaps to keep in :attr:`_labels_cmaps`.
+_LABELS_CMAPS_MAX = 8
+
+#: int: Maximum range of integer values to count by binning rather than
+# finding unique values.
+_BINCOUNT_MAX = 2 ** 20
+
+#: int: Number of values to bin at a time, limiting the size of the
+# temporary shifted copy of the labels.
+_BINCOUNT_CHUNK = 2 ** 22
+
+#: float: Golden ratio conjugate for stepping hues in
+# :obj:`DiscreteModes.GOLDEN` mode.
+_GOLDEN_RATIO_CONJ = (np.sqrt(5) - 1) / 2
+
+#: :obj:`np.ndarray`: Matplotlib "CN" color spec colors on a 0-255 scale.
+_CN_COLORS_255 = np.multiply(
+    [colors.to_rgb("C{}".format(i)) for i in range(10)], 255)
 
 
 class DiscreteModes(Enum):
     """Discrete colormap generation modes."""
     RANDOMN = auto()
     GRID = auto()
+    GOLDEN = auto()
+
+
+def _bin_labels(labels):
+    """Count the occurrences of each value in an integer labels image.
+    
+    Args:
+        labels (:obj:`np.ndarray`): Labels image.
+
+    Returns:
+        :obj:`np.ndarray`, int: Counts for each value from the minimum to
+        maximum label, and the minimum label. None if ``labels`` is not
+        an integer image, is empty, or spans :const:`_BINCOUNT_MAX` or more
+        values.
+
+    """
+    if not np.issubdtype(labels.dtype, np.integer) or labels.size == 0:
+        return None
+    if fastremap is not None:
+        # find both extremes in a single pass
+        lbl_min, lbl_max = fastremap.minmax(labels)
+    else:
+        lbl_min, lbl_max = np.amin(labels), np.amax(labels)
+    span = int(lbl_max) - int(lbl_min)
+    if span >= _BINCOUNT_MAX:
+        return None
+    # shift to start from 0 in a type that holds the full span, binning in
+    # chunks rather than shifting a copy of the whole image at once
+    labels_flat = labels.ravel()
+    counts = np.zeros(span + 1, dtype=np.intp)
+    for start in range(0, labels_flat.size, _BINCOUNT_CHUNK):
+        counts += np.bincount(
+            np.subtract(labels_flat[start:start + _BINCOUNT_CHUNK], lbl_min,
+                        dtype=np.intp), minlength=span + 1)
+    return counts, int(lbl_min)
+
+
+def unique_labels(labels):
+    """Get the unique values in a labels image.
+    
+    Uses ``fastremap`` for integer images if available, which avoids the
+    full sort in :func:`np.unique`. Otherwise, integer images whose values
+    span a limited range are binned in a single pass.
+    
+    Args:
+        labels (:obj:`np.ndarray`): Labels image.
+
+    Returns:
+        :obj:`np.ndarray`: Sorted array of unique values in ``labels``.
+
+    """
+    labels = np.asarray(labels)
+    if fastremap is not None and np.issubdtype(labels.dtype, np.integer):
+        return fastremap.unique(np.ascontiguousarray(labels))
+    binned = _bin_labels(labels)
+    if binned is not None:
+        counts, lbl_min = binned
+        return (np.flatnonzero(counts) + lbl_min).astype(labels.dtype)
+    return np.unique(labels)
+
+
+def count_unique_labels(labels):
+    """Count the unique values in a labels image.
+    
+    Uses ``fastremap`` for integer images if available, as in
+    :func:`unique_labels`. Otherwise, integer images whose values span
+    a limited range are counted by binning, which avoids sorting the image.
+    
+    Args:
+        labels (:obj:`np.ndarray`): Labels image.
+
+    Returns:
+        int: Number of unique values in ``labels``.
+
+    """
+    labels = np.asarray(labels)
+    if fastremap is not None and np.issubdtype(labels.dtype, np.integer):
+        return unique_labels(labels).size
+    binned = _bin_labels(labels)
+    if binned is not None:
+        return np.count_nonzero(binned[0])
+    return unique_labels(labels).size
 
 
 def make_dark_linear_cmap(name, color):
@@ -38,11 +168,13 @@ def make_dark_linear_cmap(name, color):
 
 
 def setup_cmaps():
-    """Setup default colormaps, storing them in :const:``CMAPS``."""
-    CMAPS[config.Cmaps.CMAP_GRBK_NAME] = make_dark_linear_cmap(
-        config.Cmaps.CMAP_GRBK_NAME.value, "green")
-    CMAPS[config.Cmaps.CMAP_RDBK_NAME] = make_dark_linear_cmap(
-        config.Cmaps.CMAP_RDBK_NAME.value, "red")
+    """Setup default colormaps, storing them in :const:``CMAPS``.
+    
+    Default colormaps are made on first access, so this function is only
+    needed to make them all up front.
+    """
+    for key in config.Cmaps:
+        CMAPS[key]
 
 
 class DiscreteColormap(colors.ListedColormap):
@@ -66,7 +198,8 @@ class DiscreteColormap(colors.ListedColormap):
     """
     def __init__(self, labels=None, seed=None, alpha=150, index_direct=True, 
                  min_val=0, max_val=255, min_any=0, background=None,
-                 dup_for_neg=False, symmetric_colors=False, cmap_labels=None):
+                 dup_for_neg=False, symmetric_colors=False, cmap_labels=None,
+                 mode=DiscreteModes.RANDOMN):
         """Generate discrete colormap for labels using 
         :func:``discrete_colormap``.
         
@@ -99,18 +232,31 @@ class DiscreteColormap(colors.ListedColormap):
                 symmetric labels centered on 0; defaults to False.
             cmap_labels (List[str]): Sequence of colors as Matplotlib color
                 strings or RGB(A) hex (eg "#0fab24ff") strings.
+            mode (:obj:`DiscreteModes`): Color generation mode; defaults
+                to :obj:`DiscreteModes.RANDOMN`.
         """
         self.norm = None
         self.cmap_labels = None
         self.img_labels = None
+        self._lut01 = None
 
         if labels is None: return
-        labels_unique = np.unique(labels)
-        if dup_for_neg and np.sum(labels_unique < 0) == 0:
+        labels_unique = unique_labels(labels)
+        if dup_for_neg and (labels_unique.size == 0 or labels_unique[0] >= 0):
             # for labels that are only >= 0, duplicate the pos portion 
-            # as neg so that images with or without negs use the same colors
-            labels_unique = np.append(
-                -1 * labels_unique[labels_unique > 0][::-1], labels_unique)
+            # as neg so that images with or without negs use the same colors;
+            # labels are sorted, so find the pos portion by binary search and
+            # negate it directly into the output
+            pos = labels_unique[np.searchsorted(labels_unique, 0, "right"):]
+            dtype = labels_unique.dtype
+            if pos.size > 0 and dtype.kind == "u":
+                # use a signed type to hold the negs of unsigned labels
+                mx = int(pos[-1])
+                dtype = libmag.dtype_within_range(-mx, mx, True, True)
+            mirrored = np.empty(pos.size + labels_unique.size, dtype=dtype)
+            np.negative(pos[::-1], out=mirrored[:pos.size], dtype=dtype)
+            mirrored[pos.size:] = labels_unique
+            labels_unique = mirrored
         num_colors = len(labels_unique)
 
         labels_offset = 0
@@ -128,12 +274,13 @@ class DiscreteColormap(colors.ListedColormap):
             # despite remaining within range for unclear reasons, fixed by
             # using float64 instead
             labels_offset = 0.5
-            bounds = labels_unique.astype(np.float64)
-            bounds -= labels_offset
             # number of boundaries should be one more than number of labels to
             # avoid need for interpolation of boundary bin numbers and
-            # potential merging of 2 extreme labels
-            bounds = np.append(bounds, [bounds[-1] + 1])
+            # potential merging of 2 extreme labels; fill a single buffer
+            # rather than casting and appending
+            bounds = np.empty(num_colors + 1, dtype=np.float64)
+            np.subtract(labels_unique, labels_offset, out=bounds[:-1])
+            bounds[-1] = bounds[-2] + 1
             # TODO: may have occasional colormap inaccuracies from this bug:
             # https://github.com/matplotlib/matplotlib/issues/9937;
             self.norm = colors.BoundaryNorm(bounds, num_colors)
@@ -141,22 +288,40 @@ class DiscreteColormap(colors.ListedColormap):
             # auto-generate colors for the number of labels
             self.cmap_labels = discrete_colormap(
                 num_colors, alpha, False, seed, min_val, max_val, min_any,
-                symmetric_colors, jitter=20, mode=DiscreteModes.RANDOMN)
+                symmetric_colors, jitter=20, mode=mode)
         else:
             # generate RGBA colors from supplied color strings
             self.cmap_labels = colors.to_rgba_array(cmap_labels) * max_val
         if background is not None:
-            # replace background label color with given color
-            bkgdi = np.where(labels_unique == background[0] - labels_offset)
-            if len(bkgdi) > 0 and bkgdi[0].size > 0:
-                self.cmap_labels[bkgdi[0][0]] = background[1]
+            # replace background label color with given color, finding the
+            # label by binary search since unique labels are sorted
+            bkgd = background[0] - labels_offset
+            bkgdi = np.searchsorted(labels_unique, bkgd)
+            if bkgdi < labels_unique.size and labels_unique[bkgdi] == bkgd:
+                self.cmap_labels[bkgdi] = background[1]
         #print(self.cmap_labels)
         self.make_cmap()
     
+    @property
+    def lut01(self):
+        """Get :attr:`cmap_labels` rescaled to 0-1.
+        
+        The rescaled colors are computed lazily and cached. Reset
+        :attr:`_lut01` to None after modifying :attr:`cmap_labels`.
+        
+        Returns:
+            :obj:`np.ndarray`: ``cmap_labels`` as a float32 array
+            rescaled from 0-255 to 0-1.
+        """
+        if self._lut01 is None:
+            # rescale in single precision; divide rather than multiply by
+            # the reciprocal to keep the max at exactly 1
+            self._lut01 = np.divide(self.cmap_labels, 255, dtype=np.float32)
+        return self._lut01
+    
     def make_cmap(self):
         """Initialize ``ListedColormap`` with stored labels rescaled to 0-1."""
-        super(DiscreteColormap, self).__init__(
-            self.cmap_labels / 255.0, "discrete_cmap")
+        super(DiscreteColormap, self).__init__(self.lut01, "discrete_cmap")
     
     def modified_cmap(self, adjust):
         """Make a modified discrete colormap from itself.
@@ -168,16 +333,44 @@ class DiscreteColormap(colors.ListedColormap):
             New ``DiscreteColormap`` instance with ``norm`` pointing to first 
             instance and ``cmap_labels`` incremented by the given value.
         """
-        cmap = DiscreteColormap()
-        # TODO: consider whether to copy instead
-        cmap.norm = self.norm
-        cmap.cmap_labels = np.copy(self.cmap_labels)
+        return self.bulk_modified(self, [adjust])[0]
+
+    @classmethod
+    def bulk_modified(cls, base, adjusts):
+        """Make a set of modified discrete colormaps from a base colormap.
+        
+        The colors for all the colormaps are adjusted in a single broadcast
+        operation rather than copying and adjusting each colormap separately.
+        
+        Args:
+            base (:obj:`DiscreteColormap`): Colormap to modify.
+            adjusts (Sequence[int]): Values by which to adjust RGB (not A)
+                values, one for each new colormap.
+        
+        Returns:
+            List[:obj:`DiscreteColormap`]: New instances with ``norm``
+            pointing to that of ``base`` and ``cmap_labels`` incremented by
+            the corresponding value in ``adjusts``.
+        """
         # labels are uint8 so should already fit within RGB bounds; colors 
         # that exceed these bounds will likely have slightly different tones 
-        # since RGB vals will not change uniformly
-        cmap.cmap_labels[:, :3] += adjust
-        cmap.make_cmap()
-        return cmap
+        # since RGB vals will not change uniformly; keep the base type and
+        # adjust in-place to preserve this behavior
+        stacks = np.repeat(base.cmap_labels[None], len(adjusts), axis=0)
+        stacks[..., :3] += np.asarray(adjusts).astype(
+            stacks.dtype)[:, None, None]
+        # rescale all the colormaps at once
+        luts = np.divide(stacks, 255, dtype=np.float32)
+        cmaps = []
+        for stack, lut in zip(stacks, luts):
+            # TODO: consider whether to copy instead
+            cmap = cls()
+            cmap.norm = base.norm
+            cmap.cmap_labels = stack
+            cmap._lut01 = lut
+            cmap.make_cmap()
+            cmaps.append(cmap)
+        return cmaps
 
     def convert_img_labels(self, img):
         """Convert an image to the indices in :attr:`img_labels` to give
@@ -204,7 +397,7 @@ class DiscreteColormap(colors.ListedColormap):
 def discrete_colormap(num_colors, alpha=255, prioritize_default=True,
                       seed=None, min_val=0, max_val=255, min_any=0,
                       symmetric_colors=False, dup_offset=0, jitter=0,
-                      mode=DiscreteModes.RANDOMN):
+                      mode=DiscreteModes.RANDOMN, rng=None):
     """Make a discrete colormap using :attr:``config.colors`` as the 
     starting colors and filling in the rest with randomly generated RGB values.
     
@@ -216,7 +409,7 @@ def discrete_colormap(num_colors, alpha=255, prioritize_default=True,
             defaults to True. Alternatively, `cn` can be given to use 
             the "CN" color spec instead.
         seed (int): Random number seed; defaults to None, in which case no seed 
-            will be set.
+            will be set. Ignored if ``rng`` is given.
         min_val (int, float): Minimum value for random numbers; defaults to 0.
         max_val (int, float): Maximum value for random numbers; defaults to 255.
             For floating point ranges such as 0.0-1.0, set as a float.
@@ -235,7 +428,12 @@ def discrete_colormap(num_colors, alpha=255, prioritize_default=True,
             randomly shifted by half this value above or below their original
             value; defaults to 0.
         mode (:obj:`DiscreteModes`): Mode given as an enumeration; defaults
-            to :obj:`DiscreteModes.RANDOMN` mode.
+            to :obj:`DiscreteModes.RANDOMN` mode. In
+            :obj:`DiscreteModes.GOLDEN` mode, hues are spaced by the golden
+            ratio so that successive colors are well separated.
+        rng (:obj:`np.random.Generator`): Random number generator, such as
+            one shared across calls; defaults to None to create a generator
+            from ``seed`` without changing Numpy's global random state.
     
     Returns:
         :obj:`np.ndaarry`: 2D Numpy array in the format 
@@ -245,6 +443,8 @@ def discrete_colormap(num_colors, alpha=255, prioritize_default=True,
         to generate a map that can be used directly in functions such 
         as ``imshow``.
     """
+    if rng is None:
+        rng = np.random.default_rng(seed)
     if symmetric_colors:
         # make room for offset when duplicating colors
         max_val -= dup_offset
@@ -256,45 +456,96 @@ def discrete_colormap(num_colors, alpha=255, prioritize_default=True,
         # between color values
         jitters = None
         if jitter > 0:
-            if seed is not None: np.random.seed(seed)
-            jitters = np.multiply(
-                np.random.random((num_colors, 3)),
-                jitter - jitter / 2).astype(int)
+            # shift by up to half the jitter value in either direction
+            jitters = rng.integers(
+                -(jitter // 2), jitter - jitter // 2, size=(num_colors, 3),
+                dtype=np.int32)
             max_val -= np.amax(jitters)
             min_val -= np.amin(jitters)
         # TODO: weight chls or scale non-linearly for better visual distinction
         space = (max_val - min_val) // np.cbrt(num_colors)
-        sl = slice(min_val, max_val, space)
-        grid = np.mgrid[sl, sl, sl]
-        coords = np.c_[grid[0].ravel(), grid[1].ravel(), grid[2].ravel()]
+        # sample grid indices and convert only these indices to coords
+        # rather than building the full grid; the number of values per axis
+        # is the same as in np.arange(min_val, max_val, space)
+        num_axis = int(np.ceil((max_val - min_val) / space))
+        num_coords = num_axis ** 3
+        num_excl = 0
         if min_any > 0:
-            # remove all coords where all vals are below threshold
+            # exclude the corner of the grid where all vals are below threshold
             # TODO: account for lost coords in initial space size determination
-            coords = coords[~np.all(np.less(coords, min_any), axis=1)]
-        if seed is not None: np.random.seed(seed)
-        rand = np.random.choice(len(coords), num_colors, replace=False)
-        rand_coords = coords[rand]
+            num_excl = int(np.clip(
+                np.ceil((min_any - min_val) / space), 0, num_axis)) ** 3
+        if num_colors > num_coords - num_excl:
+            raise ValueError(
+                "Cannot take {} colors from a grid of {} colors"
+                .format(num_colors, num_coords - num_excl))
+        rand = rng.choice(num_coords, num_colors, replace=False)
+        rand_coords = _grid_coords(rand, num_axis, min_val, space)
+        if min_any > 0:
+            # resample the coords where all vals are below threshold from
+            # the remaining grid indices
+            below = np.all(np.less(rand_coords, min_any), axis=1)
+            rand = rand[~below]
+            while len(rand) < num_colors:
+                cand = rng.choice(
+                    num_coords, num_colors - len(rand), replace=False)
+                cand = cand[~np.isin(cand, rand)]
+                cand = cand[~np.all(np.less(_grid_coords(
+                    cand, num_axis, min_val, space), min_any), axis=1)]
+                rand = np.concatenate((rand, cand))
+            rand_coords = _grid_coords(rand, num_axis, min_val, space)
         if jitters is not None:
             rand_coords = np.add(rand_coords, jitters)
         rand_coords_shape = list(rand_coords.shape)
         rand_coords_shape[-1] += 1
-        cmap = np.zeros(
+        # alpha channel is filled below
+        cmap = np.empty(
             rand_coords_shape,
             dtype=libmag.dtype_within_range(min_val, max_val))
         cmap[:, :-1] = rand_coords
+    elif mode is DiscreteModes.GOLDEN:
+        # step hues by the golden ratio conjugate from a random start for
+        # evenly distributed, distinct hues; vary saturation and value within
+        # bright ranges, keeping value above min_any since it is the max
+        # RGB component so that no colors need to be scaled up
+        val_min = 0.7
+        if min_any > 0:
+            val_min = np.clip(
+                (min_any - min_val) / (max_val - min_val), val_min, 1)
+        hsv = np.empty((num_colors, 3))
+        hsv[:, 0] = rng.random() + np.arange(num_colors) * _GOLDEN_RATIO_CONJ
+        hsv[:, 0] %= 1
+        hsv[:, 1] = rng.uniform(0.5, 1, num_colors)
+        hsv[:, 2] = rng.uniform(val_min, 1, num_colors)
+        cmap = np.empty(
+            (num_colors, 4),
+            dtype=libmag.dtype_within_range(min_val, max_val))
+        cmap[:, :3] = colors.hsv_to_rgb(hsv) * (max_val - min_val) + min_val
     else:
-        # randomly generate each color value; 4th values only for simplicity
-        # in generating array with shape for alpha channel
-        if seed is not None: np.random.seed(seed)
-        cmap = (np.random.random((num_colors, 4)) 
-                * (max_val - min_val) + min_val).astype(
-            libmag.dtype_within_range(min_val, max_val))
+        # randomly generate each RGB value, leaving the alpha channel to be
+        # filled below
+        dtype = libmag.dtype_within_range(min_val, max_val)
+        cmap = np.empty((num_colors, 4), dtype=dtype)
+        if np.issubdtype(dtype, np.integer):
+            # generate directly in the output type, excluding max_val as
+            # when truncating values from the half-open float range
+            cmap[:, :3] = rng.integers(
+                int(min_val), int(max_val), size=(num_colors, 3), dtype=dtype)
+        else:
+            cmap[:, :3] = (rng.random((num_colors, 3), dtype=np.float32)
+                           * (max_val - min_val) + min_val)
         if min_any > 0:
-            # if all vals below threshold, scale up lowest value
+            # if all vals below threshold, scale up lowest value, gathering
+            # these rows once and updating their lowest values in-place
             below_offset = np.all(np.less(cmap[:, :3], min_any), axis=1)
-            axes = np.argmin(cmap[below_offset, :3], axis=1)
-            cmap[below_offset, axes] = np.multiply(
-                cmap[below_offset, axes], max_val / min_any)
+            if np.any(below_offset):
+                below = cmap[below_offset, :3]
+                axes = np.argmin(below, axis=1)[:, None]
+                vals = (np.take_along_axis(below, axes, axis=1)
+                        * (max_val / min_any))
+                np.put_along_axis(
+                    below, axes, vals.astype(cmap.dtype, copy=False), axis=1)
+                cmap[below_offset, :3] = below
     
     if symmetric_colors:
         # invert latter half onto former half, assuming that corresponding
@@ -308,18 +559,43 @@ def discrete_colormap(num_colors, alpha=255, prioritize_default=True,
         colors_default = config.colors
         if prioritize_default == "cn":
             # "CN" color spec
-            colors_default = np.multiply(
-                [colors.to_rgb("C{}".format(i)) for i in range(10)], 255)
+            colors_default = _CN_COLORS_255
         end = min((num_colors, len(colors_default)))
         cmap[:end, :3] = colors_default[:end]
     return cmap
 
 
+def _grid_coords(inds, num_axis, min_val, space):
+    """Convert flat indices in an evenly spaced 3D grid to coordinates.
+    
+    Args:
+        inds (:obj:`np.ndarray`): Flat indices in C order.
+        num_axis (int): Number of grid values along each axis.
+        min_val (int, float): Value of the first grid position.
+        space (int, float): Spacing between grid values.
+
+    Returns:
+        :obj:`np.ndarray`: Array of shape ``(len(inds), 3)`` with the
+        coordinates corresponding to ``inds``.
+
+    """
+    z, rem = np.divmod(inds, num_axis * num_axis)
+    y, x = np.divmod(rem, num_axis)
+    return np.column_stack((z, y, x)) * space + min_val
+
+
 def get_labels_discrete_colormap(labels_img, alpha_bkgd=255, dup_for_neg=False, 
                                  use_orig_labels=False, symmetric_colors=False):
     """Get a default discrete colormap for a labels image, assuming that 
     background is 0, and the seed is determined by :attr:``config.seed``.
     
+    Colors are generated in :obj:`DiscreteModes.GOLDEN` mode for distinct
+    hues among neighboring labels.
+    
+    Colormaps are cached so that repeated calls for labels with the same
+    content and settings return copies of the same colormap, which
+    callers can modify without affecting other callers.
+    
     Args:
         labels_img: Labels image as a Numpy array.
         alpha_bkgd: Background alpha level from 0 to 255; defaults to 255 
@@ -340,10 +616,35 @@ def get_labels_discrete_colormap(labels_img, alpha_bkgd=255, dup_for_neg=False,
     if use_orig_labels and config.labels_img_orig is not None:
         # use original labels if available for mapping consistency
         lbls = config.labels_img_orig
-    return DiscreteColormap(
+    key = None
+    if lbls is not None:
+        # reuse the colormap for identical labels and settings; hash the
+        # labels' content rather than relying on the array's identity
+        # since labels may be edited in-place
+        lbls = np.ascontiguousarray(lbls)
+        key = (hashlib.blake2b(lbls, digest_size=16).digest(), lbls.shape,
+               lbls.dtype.str, alpha_bkgd, dup_for_neg, symmetric_colors,
+               config.seed)
+        if key in _labels_cmaps:
+            # copy since callers may modify the colormap, such as its
+            # color for bad values
+            return copy.copy(_labels_cmaps[key])
+    cmap = DiscreteColormap(
         lbls, config.seed, 255, min_any=160, min_val=10,
         background=(0, (0, 0, 0, alpha_bkgd)), dup_for_neg=dup_for_neg,
-        symmetric_colors=symmetric_colors)
+        symmetric_colors=symmetric_colors, mode=DiscreteModes.GOLDEN)
+    if key is not None:
+        if len(_labels_cmaps) >= _LABELS_CMAPS_MAX:
+            # remove the earliest colormap
+            del _labels_cmaps[next(iter(_labels_cmaps))]
+        _labels_cmaps[key] = cmap
+        cmap = copy.copy(cmap)
+    return cmap
+
+
+def clear_labels_cmaps():
+    """Clear the colormaps cached by :func:`get_labels_discrete_colormap`."""
+    _labels_cmaps.clear()
 
 
 def get_borders_colormap(borders_img, labels_img, cmap_labels):
@@ -369,15 +670,15 @@ def get_borders_colormap(borders_img, labels_img, cmap_labels):
     """
     cmap_borders = None
     if borders_img is not None:
-        if np.unique(labels_img).size == np.unique(borders_img).size:
+        if count_unique_labels(labels_img) == count_unique_labels(borders_img):
             # get matching colors by using labels colormap as template, 
             # with brightest colormap for original (channel 0) borders
             channels = 1
             if borders_img.ndim >= 4:
                 channels = borders_img.shape[-1]
-            cmap_borders = [
-                cmap_labels.modified_cmap(int(40 / (channel + 1)))
-                for channel in range(channels)]
+            cmap_borders = DiscreteColormap.bulk_modified(
+                cmap_labels,
+                [int(40 / (channel + 1)) for channel in range(channels)])
         else:
             # get a new colormap if borders image has different number 
             # of labels while still ensuring a transparent background
@@ -432,7 +733,7 @@ def get_cmap(cmap, n=None):
     will be retrieved. Colormaps that are strings will be converted to 
     the associated standard `Colormap` object, while enums in 
     :class:``config.Cmaps`` will be used to retrieve a `Colormap` object 
-    from :const:``CMAPS``, which is assumed to have been initialized.
+    from :const:``CMAPS``.
     
     Args:
         cmap: Colormap given as a string of Enum or list of colormaps.
@@ -449,8 +750,8 @@ def get_cmap(cmap, n=None):
     if isinstance(cmap, str):
         # cmap given as a standard Matplotlib colormap name
         cmap = cm.get_cmap(cmap)
-    elif cmap in config.Cmaps:
-        # assume default colormaps have been initialized
+    elif isinstance(cmap, config.Cmaps):
+        # default colormaps are made on first access
         cmap = CMAPS[cmap]
     return cmap
 
@@ -304,7 +304,7 @@ def overlay_images(ax, aspect, origin, imgs2d, channels, cmaps, alphas=None,
             img = transform.resize(
                 img, shape, order=0, anti_aliasing=False,
                 preserve_range=True, mode="reflect").astype(np.int)
-        if check_single and discrete and len(np.unique(img)) < 2:
+        if check_single and discrete and np.amin(img) == np.amax(img):
             # WORKAROUND: increment the last val of single unique val images
             # shown with a DiscreteColormap (or any ListedColormap) since
             # they otherwise fail to update on subsequent imshow calls
@@ -622,6 +622,9 @@ notify_attach = None
 WARN_IMPORT_SCALEBAR = (
     "Matplotlib ScaleBar could not be found, so scale bars will not be "
     "displayed")
+WARN_IMPORT_FASTREMAP = (
+    "fastremap could not be found, so unique labels will be found through "
+    "Numpy instead")
 
 # PROFILE SETTINGS
 
@@ -1141,9 +1141,7 @@ def map_meas_to_labels(labels_img, df, meas, fn_avg, skip_nans=False,
               .format(meas))
         return None
     
-    # make image array to map differences for each label and filter data 
-    # frame to get only these regions
-    labels_diff = np.zeros_like(labels_img, dtype=np.float)
+    # filter data frame to get only the regions in the labels image
     labels_img_abs = np.abs(labels_img)
     regions = np.unique(labels_img_abs)
     df = df.loc[df["Region"].isin(regions)].copy()
@@ -1169,17 +1167,20 @@ def map_meas_to_labels(labels_img, df, meas, fn_avg, skip_nans=False,
         else:
             df.loc[:, meas] *= wts
     
-    for region in regions:
+    # group rows by region once rather than filtering the frame per region
+    df_empty = df.iloc[:0]
+    df_regions = dict(list(df.groupby(LabelMetrics.Region.name)))
+    diffs = np.zeros(len(regions))
+    for i, region in enumerate(regions):
         # get difference for each region, either from a single column 
         # that already has the difference of effect size of by taking 
         # the difference from two columns
-        df_region = df[df[LabelMetrics.Region.name] == region]
-        labels_region = labels_img_abs == region
+        df_region = df_regions.get(region, df_empty)
         diff = np.nan
         if fn_avg is None:
             # assume that df was output by R clrstats package
             if df_region.shape[0] > 0:
-                diff = df_region[meas]
+                diff = df_region[meas].values[0]
         else:
             if len(conds) >= 2:
                 # compare the metrics for the first two conditions
@@ -1197,8 +1198,11 @@ def map_meas_to_labels(labels_img, df, meas, fn_avg, skip_nans=False,
                 diff = fn_avg(df_region[meas])
         if skip_nans and np.isnan(diff):
             diff = 0
-        labels_diff[labels_region] = diff
+        diffs[i] = diff
         print("label {} difference: {}".format(region, diff))
+    
+    # map all regions to their differences in a single pass over the image
+    labels_diff = cv_nd.map_labels(labels_img_abs, regions, diffs, default=0.)
     return labels_diff
 
 
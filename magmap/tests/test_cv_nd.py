@@ -0,0 +1,42 @@
+# MagellanMapper unit testing for n-dimensional image processing
+"""Unit testing for :mod:`magmap.cv.cv_nd`."""
+
+import unittest
+
+import numpy as np
+
+from magmap.cv import cv_nd
+
+
+class TestMapLabels(unittest.TestCase):
+    
+    def setUp(self):
+        self.labels = np.array([[0, 1, -1], [2, -2, 5]])
+        self.ids = [1, -1, 2]
+        self.vals = [10, -10, 20]
+    
+    def test_map_labels_int(self):
+        mapped = cv_nd.map_labels(self.labels, self.ids, self.vals)
+        np.testing.assert_array_equal(
+            mapped, [[0, 10, -10], [20, -2, 5]])
+        self.assertEqual(mapped.dtype, self.labels.dtype)
+    
+    def test_map_labels_default(self):
+        mapped = cv_nd.map_labels(
+            self.labels, self.ids, self.vals, default=0.5)
+        np.testing.assert_array_equal(
+            mapped, [[0.5, 10, -10], [20, 0.5, 0.5]])
+    
+    def test_map_labels_float(self):
+        labels = self.labels.astype(np.float32)
+        mapped = cv_nd.map_labels(labels, self.ids, self.vals)
+        np.testing.assert_array_equal(
+            mapped, [[0, 10, -10], [20, -2, 5]])
+        self.assertEqual(mapped.dtype, np.float32)
+        mapped = cv_nd.map_labels(labels, self.ids, self.vals, default=0)
+        np.testing.assert_array_equal(
+            mapped, [[0, 10, -10], [20, 0, 0]])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,38 @@
+# MagellanMapper unit testing for volume measurements
+"""Unit testing for :mod:`magmap.stats.vols`."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from magmap.stats import vols
+
+
+class TestMapMeasToLabels(unittest.TestCase):
+    
+    def setUp(self):
+        self.labels = np.array([[0, 1, -1], [2, -2, 5]])
+        self.df = pd.DataFrame({
+            "Region": [1, 1, 2, 2],
+            "Condition": ["a", "b", "a", "b"],
+            "Vol": [1., 3., 2., 7.],
+        })
+    
+    def test_map_meas_conditions(self):
+        labels_diff = vols.map_meas_to_labels(
+            self.labels, self.df, "Vol", np.mean, skip_nans=True,
+            reverse=True)
+        np.testing.assert_array_equal(
+            labels_diff, [[0, -2, -2], [-5, -5, 0]])
+    
+    def test_map_meas_float_labels(self):
+        labels = np.array([[0, 1.5, -1.5], [2, -2, 5]], dtype=np.float32)
+        df = pd.DataFrame({"Region": [1.5, 2], "Vol": [0.5, 0.25]})
+        labels_diff = vols.map_meas_to_labels(labels, df, "Vol", None)
+        np.testing.assert_array_equal(
+            labels_diff, [[np.nan, 0.5, 0.5], [0.25, 0.25, np.nan]])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -32,6 +32,7 @@ config = {
     "python_requires": ">=3.6",  # may work on earlier versions
     "install_requires": [
         "scikit-image",
+        "imageio",  # also a scikit-image dependency
         # PlotEditor performance regression with 3.3.0-3.3.1
         "matplotlib != 3.3.0, != 3.3.1",
         "vtk<9.0.0",  # Mayavi 4.7.1 is not compatible with VTK 9
@@ -51,6 +52,8 @@ config = {
         "all": [
             "matplotlib_scalebar", 
             "pyamg",  # for Random-Walker segmentation "cg_mg" mode
+            "fastremap",  # faster unique labels
+            "imageio-ffmpeg",  # export animations to MP4
             *_EXTRAS_PANDAS,
             *_EXTRAS_IMPORT,  
             *_EXTRAS_AWS, 